@@ -0,0 +1,328 @@
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(
+        "checkhost_scraper.aggregate requires numpy. Install it with `pip install checkhost_scraper[aggregate]`"
+    ) from e
+
+from .models import CheckHostReport
+
+
+# `result` values that count as a success, by report type. Ping and DNS are handled separately.
+SUCCESS_RESULTS = {
+    "check-http": {"OK"},
+    "check-tcp": {"Connected"},
+    "check-udp": {"Open or filtered"},
+}
+GROUP_BY_COLUMNS = ("country_code", "location", "report_type")
+VALUE_COLUMNS = ("time", "rtt_min", "rtt_avg", "rtt_max")
+
+
+class ReportColumns:
+    """
+    Results of many reports, flattened into NumPy columns (one element per
+    result row) so that grouped statistics can be computed without Python loops.
+
+    String columns (`report_id`, `report_type`, `country_code`, `location`) are
+    dictionary-encoded: the column holds int32 codes, and the labels are kept
+    in `categories[<column>]`.
+
+    Numeric columns are NaN (or -1 for `status_code`) where a value doesn't
+    apply to the report type, or the check failed:
+     * `success`      Whether the check succeeded (ping: at least one reply)
+     * `time`         Seconds (check-http, check-tcp)
+     * `rtt_min`, `rtt_avg`, `rtt_max`  Milliseconds (check-ping)
+     * `packets_received`, `packets_sent`  (check-ping)
+     * `status_code`  HTTP status code (check-http)
+
+    Example usage:
+    >>> columns = ReportColumns.from_jsonl("reports.jsonl")
+    >>> group_stats(columns.select(report_type="check-http"), by="country_code", value="time")
+    {'BR': {'count': 12, 'success_ratio': 1.0, 'min': 0.03, 'mean': 0.05, 'max': 0.09, 'p95': 0.08}, ...}
+    """
+    def __init__(self, categories: dict[str, list[str]], **arrays: np.ndarray):
+        self.categories = categories
+        self.report_id = arrays["report_id"]
+        self.report_type = arrays["report_type"]
+        self.country_code = arrays["country_code"]
+        self.location = arrays["location"]
+        self.success = arrays["success"]
+        self.time = arrays["time"]
+        self.rtt_min = arrays["rtt_min"]
+        self.rtt_avg = arrays["rtt_avg"]
+        self.rtt_max = arrays["rtt_max"]
+        self.packets_received = arrays["packets_received"]
+        self.packets_sent = arrays["packets_sent"]
+        self.status_code = arrays["status_code"]
+
+
+    def __len__(self) -> int:
+        return len(self.success)
+
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {
+            name: getattr(self, name) for name in (
+                "report_id", "report_type", "country_code", "location", "success", "time",
+                "rtt_min", "rtt_avg", "rtt_max", "packets_received", "packets_sent", "status_code",
+            )
+        }
+
+
+    def filter(self, mask: np.ndarray) -> "ReportColumns":
+        """
+        Returns a new ReportColumns holding only the rows where `mask` is True.
+        """
+        return ReportColumns(self.categories, **{name: arr[mask] for name, arr in self._arrays().items()})
+
+
+    def select(self, **labels: str) -> "ReportColumns":
+        """
+        Returns a new ReportColumns holding only the rows whose string columns
+        equal the given labels, e.g. `select(report_type="check-ping", country_code="BR")`.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, label in labels.items():
+            categories = self.categories[column]
+            if label not in categories:
+                return self.filter(np.zeros(len(self), dtype=bool))
+            mask &= getattr(self, column) == categories.index(label)
+        return self.filter(mask)
+
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Union[CheckHostReport, dict]]) -> "ReportColumns":
+        """
+        Builds columns from CheckHostReport objects, or their `model_dump()`
+        dicts. InvalidReports (and reports without results) are skipped.
+        """
+        builder = _ColumnBuilder()
+        for report in reports:
+            if not isinstance(report, dict):
+                report = report.model_dump()
+            builder.add(report)
+        return builder.build()
+
+
+    @classmethod
+    def from_jsonl(cls, path: Union[str, Path]) -> "ReportColumns":
+        """
+        Builds columns from a JSON lines file, as written by `cli.py --output_file`.
+        """
+        builder = _ColumnBuilder()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    builder.add(json.loads(line))
+        return builder.build()
+
+
+class _ColumnBuilder:
+    """
+    Accumulates report rows into Python lists (one per column), then converts
+    them to NumPy arrays in a single pass.
+    """
+    def __init__(self):
+        self.codes = {name: {} for name in ("report_id", "report_type", "country_code", "location")}
+        self.columns = {name: [] for name in (
+            "report_id", "report_type", "country_code", "location", "success", "time",
+            "rtt_min", "rtt_avg", "rtt_max", "packets_received", "packets_sent", "status_code",
+        )}
+
+
+    def _encode(self, column: str, label: str) -> int:
+        codes = self.codes[column]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(codes)
+        return code
+
+
+    def add(self, report: dict):
+        results = report.get("results")
+        if not results:
+            return
+        report_type = report.get("report_type")
+        report_id_code = self._encode("report_id", report["report_id"])
+        report_type_code = self._encode("report_type", report_type)
+        success_results = SUCCESS_RESULTS.get(report_type, set())
+
+        cols = self.columns
+        nan = math.nan
+        for row in results:
+            cols["report_id"].append(report_id_code)
+            cols["report_type"].append(report_type_code)
+            cols["country_code"].append(self._encode("country_code", row["country_code"]))
+            cols["location"].append(self._encode("location", row["location"]))
+
+            rtt_min = rtt_avg = rtt_max = nan
+            received = sent = -1
+            if report_type == "check-ping":
+                received, sent = _parse_packets(row["result"])
+                rtt_min, rtt_avg, rtt_max = _parse_rtt(row["rtt"])
+                success = received > 0
+            elif report_type == "check-dns":
+                success = bool(row["ttl"])
+            else:
+                success = row["result"] in success_results
+
+            cols["success"].append(success)
+            cols["time"].append(_parse_seconds(row.get("time", "")))
+            cols["rtt_min"].append(rtt_min)
+            cols["rtt_avg"].append(rtt_avg)
+            cols["rtt_max"].append(rtt_max)
+            cols["packets_received"].append(received)
+            cols["packets_sent"].append(sent)
+            cols["status_code"].append(_parse_status_code(row.get("code", "")))
+
+
+    def build(self) -> ReportColumns:
+        dtypes = {
+            "report_id": np.int32, "report_type": np.int32, "country_code": np.int32, "location": np.int32,
+            "success": bool, "time": np.float64, "rtt_min": np.float64, "rtt_avg": np.float64,
+            "rtt_max": np.float64, "packets_received": np.int16, "packets_sent": np.int16, "status_code": np.int16,
+        }
+        arrays = {name: np.array(values, dtype=dtypes[name]) for name, values in self.columns.items()}
+        # Dicts keep insertion order, which is the code order
+        categories = {name: list(codes) for name, codes in self.codes.items()}
+        return ReportColumns(categories, **arrays)
+
+
+def _parse_seconds(value: str) -> float:
+    """
+    "0.076 s" -> 0.076, "" -> nan
+    """
+    try:
+        return float(value.split()[0])
+    except (IndexError, ValueError):
+        return math.nan
+
+
+def _parse_rtt(value: str) -> tuple[float, float, float]:
+    """
+    "1.4 / 1.8 / 2.4 ms" -> (1.4, 1.8, 2.4), "Traceroute" -> (nan, nan, nan)
+    """
+    parts = value.replace("ms", "").split("/")
+    try:
+        return tuple(float(p) for p in parts) if len(parts) == 3 else (math.nan,) * 3
+    except ValueError:
+        return (math.nan,) * 3
+
+
+def _parse_packets(value: str) -> tuple[int, int]:
+    """
+    "3 / 4" -> (3, 4)
+    """
+    try:
+        received, sent = value.split("/")
+        return int(received), int(sent)
+    except ValueError:
+        return 0, -1
+
+
+def _parse_status_code(value: str) -> int:
+    """
+    "301 (Moved Permanently)" -> 301, "" -> -1
+    """
+    head = value.split(" ", 1)[0]
+    return int(head) if head.isdigit() else -1
+
+
+def _group_codes(columns: ReportColumns, by: str) -> tuple[np.ndarray, list[str]]:
+    if by not in GROUP_BY_COLUMNS:
+        raise ValueError(f"Can't group by {by!r}, expected one of {GROUP_BY_COLUMNS}")
+    return getattr(columns, by), columns.categories[by]
+
+
+def group_stats(columns: ReportColumns, by: str = "country_code", value: Optional[str] = "time") -> dict[str, dict]:
+    """
+    Computes per-group statistics over all rows in `columns`.
+
+    For each group: `count` rows, `success_ratio`, and the `min`, `mean`, `max`
+    and `p95` (linearly interpolated, as numpy.percentile) of the `value` column.
+    Missing values (NaN) are ignored, and a group's stats are NaN if it has no
+    values at all.
+
+    :param columns: ReportColumns to aggregate (see ReportColumns.select to restrict the report type)
+    :param by: One of GROUP_BY_COLUMNS
+    :param value: One of VALUE_COLUMNS, or None for counts and success ratios only
+    :return: Mapping of group label to stats
+    """
+    codes, labels = _group_codes(columns, by)
+    n_groups = len(labels)
+
+    counts = np.bincount(codes, minlength=n_groups)
+    successes = np.bincount(codes, weights=columns.success, minlength=n_groups)
+    stats = {
+        "count": counts,
+        "success_ratio": np.divide(successes, counts, out=np.full(n_groups, np.nan), where=counts > 0),
+    }
+
+    if value is not None:
+        if value not in VALUE_COLUMNS:
+            raise ValueError(f"Can't aggregate {value!r}, expected one of {VALUE_COLUMNS}")
+        stats.update(_value_stats(codes, getattr(columns, value), n_groups))
+
+    present = counts > 0
+    return {
+        labels[g]: {name: arr[g].item() for name, arr in stats.items()}
+        for g in np.flatnonzero(present)
+    }
+
+
+def _value_stats(codes: np.ndarray, values: np.ndarray, n_groups: int) -> dict[str, np.ndarray]:
+    keep = ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+
+    # Sort by group, then value, so each group is a contiguous sorted run
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+
+    n = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))
+    has_values = n > 0
+
+    out = {name: np.full(n_groups, np.nan) for name in ("min", "mean", "max", "p95")}
+    if not has_values.any():
+        return out
+
+    first, last = starts[has_values], starts[has_values] + n[has_values] - 1
+    out["min"][has_values] = values[first]
+    out["max"][has_values] = values[last]
+    out["mean"][has_values] = np.bincount(codes, weights=values, minlength=n_groups)[has_values] / n[has_values]
+
+    pos = 0.95 * (n[has_values] - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    frac = pos - lo
+    out["p95"][has_values] = values[first + lo] + (values[first + hi] - values[first + lo]) * frac
+    return out
+
+
+def status_code_histogram(columns: ReportColumns, by: str = "country_code") -> dict[str, dict[int, int]]:
+    """
+    Counts HTTP status codes per group. Rows without a status code (e.g., a
+    timed out check, or a non check-http report) are counted under -1.
+
+    :param columns: ReportColumns to aggregate
+    :param by: One of GROUP_BY_COLUMNS
+    :return: Mapping of group label to {status code: count}
+    """
+    codes, labels = _group_codes(columns, by)
+    status = columns.status_code.astype(np.int64)
+
+    # Combine (group, status) into a single key, so one np.unique counts every pair
+    offset = int(status.min(initial=0))
+    width = int(status.max(initial=0)) - offset + 1
+    keys, counts = np.unique(codes.astype(np.int64) * width + (status - offset), return_counts=True)
+
+    histogram = {}
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        group, code = divmod(key, width)
+        histogram.setdefault(labels[group], {})[code + offset] = count
+    return histogram
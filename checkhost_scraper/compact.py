@@ -0,0 +1,202 @@
+import json
+from array import array
+from pathlib import Path
+from typing import Hashable, Iterable, Iterator, Optional, Union
+
+from .models import (
+    CheckHostReport,
+    CheckHttpReportResult,
+    CheckDnsReportResult,
+    CheckPingReportResult,
+    CheckTcpReportResult,
+    CheckUdpReportResult,
+    InvalidReport,
+    FailedReport
+)
+
+
+# Maps report type to the result model, and the order its fields are stored in
+RESULT_MODELS = {
+    "check-http": CheckHttpReportResult,
+    "check-dns": CheckDnsReportResult,
+    "check-ping": CheckPingReportResult,
+    "check-tcp": CheckTcpReportResult,
+    "check-udp": CheckUdpReportResult,
+}
+RESULT_FIELDS = {report_type: tuple(model.model_fields) for report_type, model in RESULT_MODELS.items()}
+
+
+class ValuePool:
+    """
+    Dictionary-encodes repeated values (strings, or frozensets for DNS
+    results): each distinct value is stored once, and referred to by an
+    integer code.
+    """
+    __slots__ = ("_codes", "_values")
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+
+
+    def encode(self, value: Hashable) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+
+
+    def decode(self, code: int) -> Hashable:
+        return self._values[code]
+
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class CompactReport:
+    """
+    A single report held by a CompactReportCollection. Result cells are
+    stored row-major in one flat array of ValuePool codes.
+    """
+    __slots__ = ("report_id", "permalink", "report_type", "target", "date", "reason", "cells", "failure")
+
+    def __init__(self, report_id: str, permalink: Optional[str] = None, report_type: Optional[int] = None,
+                 target: Optional[str] = None, date: Optional[str] = None, reason: Optional[str] = None,
+                 cells: Optional[array] = None, failure: Optional[FailedReport] = None):
+        self.report_id = report_id
+        self.permalink = permalink
+        self.report_type = report_type
+        self.target = target
+        self.date = date
+        self.reason = reason
+        self.cells = cells
+        self.failure = failure  # Kept as-is, as failures should be rare
+
+
+class CompactReportCollection:
+    """
+    Memory-compact, append-only collection of reports, for holding large
+    batches in memory.
+
+    Compared to a list of CheckHostReport objects, each result row costs a
+    few array slots rather than a pydantic model plus its own strings: the
+    repeated fields (country code, location, result, code, IP, ...) are
+    dictionary-encoded through a shared ValuePool, and DNS result sets are
+    stored as shared frozensets. Reports are converted back to pydantic
+    models on access.
+
+    Example usage:
+    >>> reports = CompactReportCollection.from_jsonl("reports.jsonl")
+    >>> len(reports)
+    >>> report = reports[0]  # CheckHostReport
+    >>> for report in reports:
+    ...     ...
+    """
+    def __init__(self):
+        self.pool = ValuePool()
+        self._reports = []
+
+
+    def __len__(self) -> int:
+        return len(self._reports)
+
+
+    def __getitem__(self, index: int) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+        return self._to_model(self._reports[index])
+
+
+    def __iter__(self) -> Iterator[Union[CheckHostReport, InvalidReport, FailedReport]]:
+        for compact in self._reports:
+            yield self._to_model(compact)
+
+
+    def append(self, report: Union[CheckHostReport, InvalidReport, FailedReport, dict]):
+        """
+        Adds a report, given as a model or as its `model_dump()` dict.
+        """
+        if not isinstance(report, dict):
+            report = report.model_dump()
+
+        if "error" in report:
+            self._reports.append(CompactReport(report.get("report_id"), failure=FailedReport(**report)))
+            return
+        if "reason" in report:
+            self._reports.append(CompactReport(report["report_id"], reason=report["reason"]))
+            return
+
+        report_type = report.get("report_type")
+        cells = None
+        if report.get("results") is not None:
+            if report_type not in RESULT_FIELDS:
+                raise ValueError(f"Unknown report type: {report_type}")
+            cells = array("I")
+            encode = self.pool.encode
+            for row in report["results"]:
+                for field in RESULT_FIELDS[report_type]:
+                    value = row[field]
+                    # DNS results are sets (or lists, once serialised to JSON)
+                    cells.append(encode(frozenset(value) if isinstance(value, (set, list)) else value))
+
+        self._reports.append(CompactReport(
+            report_id=report["report_id"],
+            permalink=report.get("permalink"),
+            report_type=None if report_type is None else self.pool.encode(report_type),
+            target=report.get("target"),
+            date=report.get("date"),
+            cells=cells,
+        ))
+
+
+    def extend(self, reports: Iterable[Union[CheckHostReport, InvalidReport, FailedReport, dict]]):
+        for report in reports:
+            self.append(report)
+
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Union[CheckHostReport, InvalidReport, FailedReport, dict]]) -> "CompactReportCollection":
+        collection = cls()
+        collection.extend(reports)
+        return collection
+
+
+    @classmethod
+    def from_jsonl(cls, path: Union[str, Path]) -> "CompactReportCollection":
+        """
+        Loads a JSON lines file, as written by `cli.py --output_file`.
+        """
+        collection = cls()
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    collection.append(json.loads(line))
+        return collection
+
+
+    def _to_model(self, compact: CompactReport) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+        if compact.failure is not None:
+            return compact.failure
+        if compact.reason is not None:
+            return InvalidReport(report_id=compact.report_id, reason=compact.reason)
+
+        report_type = None if compact.report_type is None else self.pool.decode(compact.report_type)
+        results = None
+        if compact.cells is not None:
+            model = RESULT_MODELS[report_type]
+            fields = RESULT_FIELDS[report_type]
+            width = len(fields)
+            decode = self.pool.decode
+            results = []
+            for start in range(0, len(compact.cells), width):
+                row = {field: decode(code) for field, code in zip(fields, compact.cells[start:start + width])}
+                results.append(model(**row))
+
+        return CheckHostReport(
+            report_id=compact.report_id,
+            permalink=compact.permalink,
+            report_type=report_type,
+            target=compact.target,
+            date=compact.date,
+            results=results,
+        )
@@ -114,12 +114,15 @@ class CheckHostReport(BaseModel):
             ...
         ]
     }
+
+    Apart from `report_id`, fields are None if they were left out of a
+    projected scrape (see `CheckHostReportScraper.scrape(fields=...)`).
     """
     report_id: str
-    permalink: str
-    report_type: str
-    target: str
-    date: str
+    permalink: Optional[str] = None
+    report_type: Optional[str] = None
+    target: Optional[str] = None
+    date: Optional[str] = None
     results: Optional[List[Union[
         CheckHttpReportResult, 
         CheckDnsReportResult, 
@@ -134,7 +137,55 @@ class InvalidReport(BaseModel):
     reason: str
 
 
+class FailedReport(BaseModel):
+    """
+    A report that could not be parsed (e.g., after a change to check-host's
+    markup), recorded in place of the report so that a batch can carry on.
+
+    Example structure:
+    {
+        "report_id": "23d4f6aekc8",
+        "reason": "Missing result columns: ['Code']",
+        "error": "ReportParseException",
+        "source": "https://check-host.net/check-report/23d4f6aekc8?lang=en",
+        "html_path": "failed/23d4f6aekc8.html"
+    }
+    """
+    report_id: Optional[str] = None
+    reason: str
+    error: str
+    source: Optional[str] = None
+    html_path: Optional[str] = None
+
+    @classmethod
+    def from_exception(cls, error: Exception, **kwargs) -> "FailedReport":
+        """
+        Records `error` as the reason a report failed. Other fields (e.g.,
+        `report_id`, `source`) are passed as keyword arguments.
+        """
+        reason = getattr(error, "message", None) or str(error) or type(error).__name__
+        return cls(reason=reason, error=type(error).__name__, **kwargs)
+
+
 class ReportNotFoundException(Exception):
     def __init__(self, message: str = "Report not found"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class PoolBusyException(Exception):
+    def __init__(self, message: str = "Scraper pool is busy"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ReportTimeoutException(Exception):
+    def __init__(self, message: str = "Report deadline exceeded"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class ReportParseException(Exception):
+    def __init__(self, message: str = "Report could not be parsed"):
         self.message = message
         super().__init__(self.message)
\ No newline at end of file
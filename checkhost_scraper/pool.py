@@ -0,0 +1,338 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+from .scraper import CheckHostReportScraper
+from .models import (
+    CheckHostReport,
+    InvalidReport,
+    FailedReport,
+    PoolBusyException
+)
+
+
+LATENCY_WINDOW = 1000 # Recent scrape latencies kept for choosing the hedging delay
+HEDGE_POLL_INTERVAL = 0.05 # Seconds between checks for scrapes to hedge, while waiting for an idle scraper
+
+
+class ScraperPool:
+    """
+    Keeps a fixed number of warm CheckHostReportScraper instances (and so
+    browsers) alive, and runs scrapes on them with bounded concurrency.
+
+    At most `size` reports are scraped at once. Up to `max_queue` further
+    reports wait for a free scraper; beyond that, PoolBusyException is raised
+    so callers can shed load rather than queue without limit.
+
+    Slow scrapes can be hedged to cut tail latency (see scrape_many).
+
+    Example usage:
+    >>> pool = ScraperPool(size=4)
+    >>> report = pool.scrape("23d52df5k770")
+    >>> reports = pool.scrape_many(["23d52df5k770", "23d58148k840"])
+    >>> for report in pool.iter_scrape(many_report_ids):
+    ...     print(report)
+    >>> pool.close()
+    """
+    def __init__(
+            self,
+            size: int = 2,
+            max_queue: int = 64,
+            scraper_factory: Callable[[], CheckHostReportScraper] = CheckHostReportScraper,
+            hedge_percentile: Optional[float] = None,
+            hedge_min_samples: int = 20):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        if hedge_percentile is not None and not 0 < hedge_percentile < 100:
+            raise ValueError("Hedge percentile must be between 0 and 100")
+        self.size = size
+        self.max_queue = max_queue
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+        # Idle scrapers. There is exactly one per executor thread, so a worker
+        # never waits here for long.
+        self._idle = queue.Queue()
+        self._scrapers = []
+        for _ in range(size):
+            scraper = scraper_factory()
+            scraper.start()
+            self._scrapers.append(scraper)
+            self._idle.put(scraper)
+
+        self._executor = ThreadPoolExecutor(max_workers=size)
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)  # Notified whenever an attempt frees its slot
+        self._pending = 0  # Reports admitted but not yet finished (running + queued)
+        self._latencies = deque(maxlen=LATENCY_WINDOW)  # Seconds taken by recent successful scrapes
+        self.hedge_counts = Counter()  # "sent", and "won" when the hedge finished first
+
+
+    def _admit(self, n: int, block: bool = False):
+        """
+        Reserves room for `n` more attempts. If the pool is full, raises
+        PoolBusyException, or with `block`, waits for room.
+        """
+        with self._released:
+            while self._pending + n > self.size + self.max_queue:
+                if not block:
+                    raise PoolBusyException
+                self._released.wait()
+            self._pending += n
+
+
+    def _release(self):
+        with self._released:
+            self._pending -= 1
+            self._released.notify()
+
+
+    def _run(self, attempt: "_Attempt", report_id: str, timeout: Optional[float], scrape_kwargs: dict) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+        scraper = self._idle.get()
+        attempt.started = time.monotonic()
+        try:
+            report = scraper.scrape(report_id, timeout=timeout, **scrape_kwargs)
+            self._latencies.append(time.monotonic() - attempt.started)
+            return report
+        finally:
+            self._idle.put(scraper)
+            self._release()
+
+
+    def _submit(self, report_id: str, timeout: Optional[float], scrape_kwargs: dict, hedge: bool = False) -> "_Attempt":
+        attempt = _Attempt(hedge)
+        attempt.future = self._executor.submit(self._run, attempt, report_id, timeout, scrape_kwargs)
+        return attempt
+
+
+    def scrape(self, report_id: str, timeout: Optional[float] = None, **scrape_kwargs) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+        """
+        Scrapes a single report on the next free scraper.
+
+        :param report_id: The ID of the report to scrape
+        :param timeout: Optional deadline, in seconds, for each attempt at the report (see CheckHostReportScraper.scrape)
+        :param scrape_kwargs: Passed on to CheckHostReportScraper.scrape (e.g., `fields`)
+        :return: CheckHostReport object
+        """
+        return self.scrape_many([report_id], timeout=timeout, **scrape_kwargs)[0]
+
+
+    def scrape_many(
+            self,
+            report_ids: List[str],
+            timeout: Optional[float] = None,
+            return_exceptions: bool = False,
+            **scrape_kwargs) -> List[Union[CheckHostReport, InvalidReport, FailedReport, Exception]]:
+        """
+        Scrapes several reports concurrently across the pool. Results are
+        returned in the same order as `report_ids`. The whole batch is admitted
+        at once, so PoolBusyException is raised up front if it doesn't fit.
+
+        With hedging enabled (`hedge_percentile`), a report whose scrape has
+        taken longer than that percentile of recent scrapes is also sent to a
+        second, idle scraper, and whichever finishes first is used. The
+        percentile is kept up to date as the batch's own scrapes finish, so a
+        batch sent to a fresh pool is hedged too.
+
+        :param report_ids: The IDs of the reports to scrape
+        :param timeout: Optional deadline, in seconds, for each report (see CheckHostReportScraper.scrape).
+         A hedge gets whatever is left of its report's deadline.
+        :param return_exceptions: Return a report's exception in its place in the list,
+         rather than raising it
+        :param scrape_kwargs: Passed on to CheckHostReportScraper.scrape (e.g., `fields`)
+        :return: List of CheckHostReport objects
+        """
+        self._admit(len(report_ids))
+        return list(self._iter_results(report_ids, len(report_ids), False, timeout, return_exceptions, scrape_kwargs))
+
+
+    def iter_scrape(
+            self,
+            report_ids: Iterable[str],
+            timeout: Optional[float] = None,
+            return_exceptions: bool = False,
+            window: Optional[int] = None,
+            **scrape_kwargs) -> Iterator[Union[CheckHostReport, InvalidReport, FailedReport, Exception]]:
+        """
+        Like scrape_many, but yields results (in the same order as `report_ids`)
+        as they finish, and only keeps `window` reports in flight at a time. Use
+        it for long lists of reports, which then needn't fit in the pool's queue
+        or be held in memory.
+
+        Rather than raising PoolBusyException, submitting the next report waits
+        for room in the pool, which may still be taken up by other callers, or
+        by the losing attempts of hedged reports.
+
+        :param window: Number of reports in flight at once (default: twice the pool size,
+         capped at `size` + `max_queue`)
+        """
+        window = min(window or self.size * 2, self.size + self.max_queue)
+        yield from self._iter_results(report_ids, window, True, timeout, return_exceptions, scrape_kwargs)
+
+
+    def _iter_results(
+            self,
+            report_ids: Iterable[str],
+            window: int,
+            admit_each: bool,
+            timeout: Optional[float],
+            return_exceptions: bool,
+            scrape_kwargs: dict) -> Iterator[Union[CheckHostReport, InvalidReport, FailedReport, Exception]]:
+        """
+        Submits `report_ids` with at most `window` of them in flight, hedging
+        stragglers while waiting, and yields each result in order once it is
+        done. With `admit_each`, each report is admitted as it is submitted;
+        otherwise the caller has already admitted them all.
+        """
+        report_ids = iter(report_ids)
+        in_flight = deque()  # (report ID, attempts), in request order
+
+        def fill():
+            for report_id in islice(report_ids, window - len(in_flight)):
+                if admit_each:
+                    self._admit(1, block=True)
+                in_flight.append((report_id, [self._submit(report_id, timeout, scrape_kwargs)]))
+
+        fill()
+        while in_flight:
+            attempts = in_flight[0][1]
+            if not _settled(attempts):
+                next_check = self._hedge(in_flight, timeout, scrape_kwargs)
+                running = [
+                    attempt.future for _, report_attempts in in_flight for attempt in report_attempts
+                    if not attempt.future.done()
+                ]
+                wait(running, timeout=next_check, return_when=FIRST_COMPLETED)
+                continue
+
+            in_flight.popleft()
+            try:
+                yield self._first_result(attempts)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                yield e
+            fill()
+
+
+    def _hedge_after(self) -> Optional[float]:
+        """
+        Seconds after which a scrape is hedged: the `hedge_percentile` of recent
+        scrape latencies, or None if hedging is off or there are too few samples.
+        """
+        if self.hedge_percentile is None or len(self._latencies) < self.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.hedge_percentile / 100), len(latencies) - 1)
+        return latencies[index]
+
+
+    def _hedge(self, in_flight: Iterable[tuple[str, List["_Attempt"]]], timeout: Optional[float], scrape_kwargs: dict) -> Optional[float]:
+        """
+        Sends a second attempt for any running scrape in `in_flight` that has
+        passed the hedging delay (see _hedge_after), as long as there is an
+        idle scraper that no queued report is waiting for. Each report is
+        hedged at most once.
+
+        :return: Seconds until a scrape may next need hedging, or None if hedging is off
+        """
+        if self.hedge_percentile is None:
+            return None
+        hedge_after = self._hedge_after()
+        if hedge_after is None:
+            return HEDGE_POLL_INTERVAL  # Too few samples yet, check again as scrapes finish
+
+        now = time.monotonic()
+        next_check = hedge_after
+        for report_id, attempts in in_flight:
+            primary = attempts[0]
+            if len(attempts) > 1 or primary.future.done() or primary.started is None:
+                continue  # Already hedged, finished, or still queued
+
+            waited = now - primary.started
+            if waited < hedge_after:
+                next_check = min(next_check, hedge_after - waited)
+                continue
+            remaining = None if timeout is None else timeout - waited
+            if remaining is not None and remaining <= 0:
+                continue
+
+            stats = self.stats()
+            if stats["busy"] >= self.size or stats["queued"] > 0:
+                return HEDGE_POLL_INTERVAL  # Wait for an idle scraper
+            try:
+                self._admit(1)
+            except PoolBusyException:
+                return HEDGE_POLL_INTERVAL
+            attempts.append(self._submit(report_id, remaining, scrape_kwargs, hedge=True))
+            self.hedge_counts["sent"] += 1
+        return max(next_check, HEDGE_POLL_INTERVAL)
+
+
+    def _first_result(self, attempts: List["_Attempt"]) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+        """
+        Returns the result of whichever attempt succeeds first. If every attempt
+        fails, the primary attempt's exception is raised.
+        """
+        pending = {attempt.future: attempt for attempt in attempts}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                attempt = pending.pop(future)
+                if future.exception() is None:
+                    if attempt.hedge:
+                        self.hedge_counts["won"] += 1
+                    # A loser that hasn't started yet can be dropped; a running one
+                    # finishes in the background and frees its scraper.
+                    for other in pending:
+                        if other.cancel():
+                            self._release()
+                    return future.result()
+        return attempts[0].future.result()
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+        busy = self.size - self._idle.qsize()
+        fetch_counts = Counter()
+        for scraper in self._scrapers:
+            fetch_counts.update(getattr(scraper, "fetch_counts", {}))
+        return {
+            "size": self.size,
+            "busy": busy,
+            "queued": max(pending - busy, 0),
+            "max_queue": self.max_queue,
+            "fetch_counts": dict(fetch_counts),
+            "hedge_counts": dict(self.hedge_counts),
+        }
+
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for scraper in self._scrapers:
+            scraper.close()
+
+
+def _settled(attempts: List["_Attempt"]) -> bool:
+    """
+    Whether a report's result is known: an attempt has succeeded, or all have failed.
+    """
+    return (any(a.future.done() and a.future.exception() is None for a in attempts)
+            or all(a.future.done() for a in attempts))
+
+
+class _Attempt:
+    """
+    One attempt at scraping a report: the primary, or a hedge.
+    """
+    __slots__ = ("future", "started", "hedge")
+
+    def __init__(self, hedge: bool):
+        self.future = None
+        self.started = None  # time.monotonic() when a scraper picked it up
+        self.hedge = hedge
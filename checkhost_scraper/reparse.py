@@ -0,0 +1,207 @@
+import gzip
+import os
+import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+from .scraper import CheckHostReportScraper
+from .models import CheckHostReport, InvalidReport, FailedReport
+
+
+HTML_SUFFIXES = (".html", ".htm")
+WARC_SUFFIXES = (".warc", ".warc.gz")
+CHUNK_SIZE = 16 # Pages sent to a worker process at a time
+
+
+def iter_archive(path: Union[str, Path]) -> Iterator[tuple[str, Union[str, FailedReport]]]:
+    """
+    Yields (name, html) for each saved report page in `path`, which can be:
+     * A directory, searched recursively for *.html / *.htm files
+     * A tarball (optionally compressed), read as a stream
+     * A WARC file (*.warc or *.warc.gz), read as a stream
+
+    Only one page is held in memory at a time, however large the archive.
+    A WARC record whose HTTP body can't be decoded (e.g., bad chunking or a
+    corrupt gzip stream) is yielded with a FailedReport in place of its html.
+
+    :param path: Path to the directory or archive
+    """
+    path = Path(path)
+    if path.is_dir():
+        for html_path in sorted(p for p in path.rglob("*") if p.suffix.lower() in HTML_SUFFIXES):
+            yield str(html_path), html_path.read_text(errors="replace")
+    elif path.name.lower().endswith(WARC_SUFFIXES):
+        opener = gzip.open if path.name.lower().endswith(".gz") else open
+        with opener(path, "rb") as f:
+            yield from _iter_warc(f)
+    elif tarfile.is_tarfile(path):
+        # "r|*" reads the tarball sequentially, without seeking or loading the index
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                if member.isfile() and Path(member.name).suffix.lower() in HTML_SUFFIXES:
+                    yield member.name, tar.extractfile(member).read().decode(errors="replace")
+    else:
+        raise ValueError(f"Not a directory, tarball or WARC file: {path}")
+
+
+def _iter_warc(f: BinaryIO) -> Iterator[tuple[str, Union[str, FailedReport]]]:
+    """
+    Minimal streaming WARC reader. Yields (target URI, html) for each
+    "response" or "resource" record holding an HTML page.
+    """
+    while True:
+        version = f.readline()
+        if not version:
+            return
+        if not version.strip():
+            continue  # Blank lines between records
+
+        headers = {}
+        for line in iter(f.readline, b"\r\n"):
+            if not line:
+                return
+            key, _, value = line.decode(errors="replace").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        block = f.read(int(headers.get("content-length", 0)))
+        record_type = headers.get("warc-type")
+        uri = headers.get("warc-target-uri", "")
+
+        if record_type == "response" and headers.get("content-type", "").startswith("application/http"):
+            try:
+                html = _http_response_body(block)
+            except (ValueError, zlib.error) as e:
+                yield uri, FailedReport.from_exception(e, source=uri)
+                continue
+        elif record_type == "resource" and "html" in headers.get("content-type", ""):
+            html = block
+        else:
+            continue
+
+        if html is not None:
+            yield uri, html.decode(errors="replace")
+
+
+def _http_response_body(block: bytes) -> Optional[bytes]:
+    """
+    Returns the decoded body of a raw HTTP response, or None if it isn't HTML.
+    """
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode(errors="replace").split("\r\n")
+    http_headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(":")
+        http_headers[key.strip().lower()] = value.strip().lower()
+
+    if "html" not in http_headers.get("content-type", "html"):
+        return None
+    if "chunked" in http_headers.get("transfer-encoding", ""):
+        body = _dechunk(body)
+    if http_headers.get("content-encoding") in ("gzip", "deflate"):
+        body = zlib.decompress(body, zlib.MAX_WBITS | 32)
+    return body
+
+
+def _dechunk(body: bytes) -> bytes:
+    out = bytearray()
+    pos = 0
+    while True:
+        line_end = body.find(b"\r\n", pos)
+        if line_end < 0:
+            break
+        size = int(body[pos:line_end].split(b";")[0] or b"0", 16)
+        if size == 0:
+            break
+        out += body[line_end + 2:line_end + 2 + size]
+        pos = line_end + 2 + size + 2
+    return bytes(out)
+
+
+# Per-process scraper, created by the worker initializer. Its browser is never launched.
+_worker_scraper = None
+
+
+def _init_worker(failed_html_dir: Optional[Path]):
+    global _worker_scraper
+    _worker_scraper = CheckHostReportScraper(failed_html_dir=failed_html_dir)
+
+
+def _parse_chunk(pages: list[tuple[str, Union[str, FailedReport]]], parse_kwargs: dict) -> list[Union[CheckHostReport, InvalidReport, FailedReport]]:
+    return [_parse_page(_worker_scraper, name, html, parse_kwargs) for name, html in pages]
+
+
+def _parse_page(
+        scraper: CheckHostReportScraper,
+        name: str,
+        html: Union[str, FailedReport],
+        parse_kwargs: dict) -> Union[CheckHostReport, InvalidReport, FailedReport]:
+    if isinstance(html, FailedReport):
+        return html  # The page couldn't be read out of the archive
+    return scraper._parse_report(html, source=name, **parse_kwargs)
+
+
+def reparse(
+        path: Union[str, Path],
+        workers: Optional[int] = None,
+        failed_html_dir: Optional[Union[str, Path]] = None,
+        **parse_kwargs) -> Iterator[Union[CheckHostReport, InvalidReport, FailedReport]]:
+    """
+    Parses every saved report page in a directory, tarball or WARC file (see
+    iter_archive), across `workers` processes. No browser is involved.
+
+    Reports are yielded in archive order. Only a bounded number of pages are
+    in flight at once, so memory use doesn't grow with the archive size.
+    Pages that can't be parsed are yielded as a FailedReport, with `source`
+    set to their name in the archive.
+
+    Example usage:
+    >>> for report in reparse("saved_reports.tar.gz", workers=8):
+    ...     print(report.model_dump_json())
+
+    :param path: Path to the directory or archive
+    :param workers: Number of worker processes (default: one per CPU). 1 parses in this process.
+    :param failed_html_dir: Optional directory to save the HTML of pages that can't be parsed
+    :param parse_kwargs: Passed on to CheckHostReportScraper._parse_report (e.g., `fields`)
+    """
+    pages = iter_archive(path)
+
+    if workers == 1:
+        scraper = CheckHostReportScraper(failed_html_dir=failed_html_dir)
+        for name, html in pages:
+            yield _parse_page(scraper, name, html, parse_kwargs)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(failed_html_dir,)) as executor:
+        in_flight = deque()
+        for chunk in iter(lambda: list(islice(pages, CHUNK_SIZE)), []):
+            in_flight.append(executor.submit(_parse_chunk, chunk, parse_kwargs))
+            if len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def reparse_to_jsonl(
+        path: Union[str, Path],
+        output_path: Union[str, Path],
+        workers: Optional[int] = None,
+        failed_html_dir: Optional[Union[str, Path]] = None,
+        **parse_kwargs) -> int:
+    """
+    Reparses an archive (see reparse) into a JSON lines file, in the same
+    format as `cli.py --output_file`.
+
+    :return: Number of reports written
+    """
+    n = 0
+    with open(output_path, "w") as out_f:
+        for report in reparse(path, workers=workers, failed_html_dir=failed_html_dir, **parse_kwargs):
+            out_f.write(report.model_dump_json() + "\n")
+            n += 1
+    return n
@@ -1,7 +1,13 @@
+import hashlib
+import requests
+import time
 from bs4 import BeautifulSoup
+from collections import Counter
 from datetime import datetime
+from pathlib import Path
 from selenium import webdriver
-from typing import List, Union, Optional
+from selenium.common.exceptions import TimeoutException
+from typing import Iterable, List, Union, Optional
 
 from .models import (
     CheckHostReport,
@@ -11,7 +17,10 @@ from .models import (
     CheckTcpReportResult,
     CheckUdpReportResult,
     InvalidReport,
-    ReportNotFoundException
+    FailedReport,
+    ReportNotFoundException,
+    ReportParseException,
+    ReportTimeoutException
 )
 
 
@@ -23,12 +32,34 @@ EXPECTED_PING_REPORT_HEADERS = ["Location", "Result", "rtt min / avg / max", "IP
 EXPECTED_TCP_REPORT_HEADERS = ["Location", "Result", "Time", "IP address"]
 EXPECTED_UDP_REPORT_HEADERS = ["Location", "Result", "IP address"]
 EXPECTED_DNS_REPORT_HEADERS = ["Location", "Result", "TTL"]
+REPORT_FIELDS = ("permalink", "report_type", "target", "date", "results") # Fields that can be projected with `fields=`
+PROBE_TIMEOUT = 10 # Seconds to wait for the plain HTTP probe of a tiered fetch
+PAGE_LOAD_TIMEOUT = 300 # Seconds to wait for a browser page load, when scraping without a deadline (selenium's default)
+# Errors raised while parsing a page that doesn't look as expected. These are recorded as a FailedReport.
+PARSE_ERRORS = (ReportParseException, AttributeError, IndexError, KeyError, TypeError, ValueError)
 
 
 class CheckHostReportScraper:
     """
     Scrapes check-host.net for a report and returns a CheckHostReport object.
 
+    With `tiered_fetch=True`, each report is first fetched with a plain
+    (pooled) HTTP GET. Removed reports, and scrapes that don't need the
+    results table, are settled from that static HTML. Only reports whose
+    JavaScript-populated results are needed go on to a full browser render.
+    `fetch_counts` records how many scrapes each tier ("http", "browser")
+    resolved.
+
+    Pages that can't be parsed are returned as a FailedReport rather than
+    raising. With `failed_html_dir` set, their HTML is saved there too.
+
+    By default each scraper launches its own headless Chrome. To share one
+    warm browser between many scrapers (e.g., worker processes), start Chrome
+    with `--remote-debugging-port=9222` and pass `debugger_address="127.0.0.1:9222"`:
+    each scraper then attaches to it and drives its own tab. `remote_url`
+    drives the browser through a remote WebDriver endpoint (e.g., a running
+    chromedriver or Selenium Grid) instead of a local chromedriver.
+
     TODO: add proxy support
 
     Example usage:
@@ -36,7 +67,12 @@ class CheckHostReportScraper:
     >>> report = scraper.scrape("23d52df5k770")
     >>> print(report.model_dump_json())
     """
-    def __init__(self):
+    def __init__(
+            self,
+            tiered_fetch: bool = False,
+            failed_html_dir: Optional[Union[str, Path]] = None,
+            debugger_address: Optional[str] = None,
+            remote_url: Optional[str] = None):
         # Maps report type to string found in the h1 tag
         self.check_report_map = {
             "Check website": "check-http",
@@ -55,41 +91,248 @@ class CheckHostReportScraper:
             "check-udp": self._parse_check_udp_results,
         }
 
-        # Set-up selenium driver
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        self.driver = webdriver.Chrome(options=options)
+        # Selenium driver, launched on first use (see `driver`)
+        self._driver = None
+        self._page_load_timeout = PAGE_LOAD_TIMEOUT
+        self.debugger_address = debugger_address
+        self.remote_url = remote_url
+        self._window_handle = None  # This scraper's own tab, when attached to a shared browser
+
+        # HTTP session for tiered fetches, reusing connections across reports
+        self.tiered_fetch = tiered_fetch
+        self._session = None
+        self.fetch_counts = Counter()
+
+        self.failed_html_dir = None if failed_html_dir is None else Path(failed_html_dir)
+
+
+    @property
+    def driver(self) -> webdriver.Chrome:
+        """
+        The selenium driver. The browser is only launched (or attached to)
+        when first needed, so a scraper used just to parse saved HTML never
+        starts one.
+        """
+        if self._driver is None:
+            options = webdriver.ChromeOptions()
+            if self.debugger_address:
+                options.debugger_address = self.debugger_address
+            else:
+                options.add_argument("--headless")
+
+            if self.remote_url:
+                self._driver = webdriver.Remote(command_executor=self.remote_url, options=options)
+            else:
+                self._driver = webdriver.Chrome(options=options)
+
+            if self.debugger_address:
+                # Drive a tab of our own, so scrapers sharing the browser don't navigate each other's pages
+                self._driver.switch_to.new_window("tab")
+                self._window_handle = self._driver.current_window_handle
+        return self._driver
+
+
+    def start(self):
+        """
+        Launches (or attaches to) the browser now, rather than on the first scrape.
+        """
+        self.driver
 
 
-    def _get_source(self, url: str) -> str:
+    def _get_source(self, url: str, timeout: Optional[float] = None) -> str:
         """
         Fetches the HTML source of a webpage and returns it as a string.
+
+        :param timeout: Seconds to allow for the page load (default: PAGE_LOAD_TIMEOUT)
+        :raises ReportTimeoutException: If the page didn't load in time
         """
-        self.driver.get(url)
+        timeout = PAGE_LOAD_TIMEOUT if timeout is None else timeout
+        if timeout != self._page_load_timeout:
+            self.driver.set_page_load_timeout(timeout)
+            self._page_load_timeout = timeout
+        try:
+            self.driver.get(url)
+        except TimeoutException:
+            raise ReportTimeoutException
         response_text = self.driver.page_source
         return response_text
 
 
-    def scrape(self, report_id: str) -> Union[CheckHostReport, InvalidReport]:
+    def _probe(
+            self,
+            url: str,
+            fields: set[str],
+            countries: Optional[set[str]],
+            timeout: float = PROBE_TIMEOUT) -> Optional[Union[CheckHostReport, InvalidReport]]:
+        """
+        Fetches the static (non-rendered) HTML of a report with a plain HTTP GET,
+        and parses it if that is enough to settle the scrape. Returns None when
+        the report needs a full browser render, or the probe failed.
+        """
+        if self._session is None:
+            self._session = requests.Session()
+        try:
+            response = self._session.get(url, timeout=timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code >= 500:
+            return None
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        try:
+            self._check_valid(soup)
+        except ReportNotFoundException:
+            pass
+        except AttributeError:
+            return None  # No h1, e.g. an error or challenge page
+        else:
+            if "results" in fields:
+                return None
+
+        try:
+            return self._parse_soup(soup, fields, countries)
+        except PARSE_ERRORS:
+            return None  # Let the browser tier have a go (and record the failure, if it fails too)
+
+
+    def close(self):
+        """
+        Shuts down the selenium driver (and the browser it launched), if any.
+        """
+        if self._driver is not None:
+            if self._window_handle is not None:
+                # Shared browser: close just our tab, and leave the browser running for others
+                self._driver.switch_to.window(self._window_handle)
+                self._driver.close()
+                self._window_handle = None
+            self._driver.quit()
+            self._driver = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+    def scrape(
+            self,
+            report_id: str,
+            fields: Optional[Iterable[str]] = None,
+            countries: Optional[Iterable[str]] = None,
+            timeout: Optional[float] = None) -> Union[CheckHostReport, InvalidReport, FailedReport]:
         """
         Fetches the report from check-host.net and returns a CheckHostReport object.
         
         :param report_id: The ID of the report to scrape
-        :return: CheckHostReport object
+        :param fields: Optional subset of REPORT_FIELDS to populate (default: all).
+         `report_id` is always populated, and `report_type` is whenever `results` is.
+        :param countries: Optional country codes (e.g., ["BR", "VN"]) to restrict
+         the results to (default: all)
+        :param timeout: Optional deadline, in seconds, for fetching plus parsing the report.
+         A slow page load is abandoned once the deadline passes.
+        :raises ReportTimeoutException: If the deadline passed
+        :return: CheckHostReport object (or InvalidReport / FailedReport)
         """
+        deadline = None if timeout is None else time.monotonic() + timeout
         url = CHECK_HOST_URL.format(report_id=report_id)
-        return self._parse_report(self._get_source(url))
+        fields = self._normalise_fields(fields)
+        countries = self._normalise_countries(countries)
+
+        if self.tiered_fetch:
+            report = self._probe(url, fields, countries, min(PROBE_TIMEOUT, self._remaining(deadline)))
+            if report is not None:
+                self.fetch_counts["http"] += 1
+                return report
+
+        source = self._get_source(url, timeout=None if deadline is None else self._remaining(deadline))
+        self._remaining(deadline)
+        self.fetch_counts["browser"] += 1
+        return self._parse_report(source, fields, countries, report_id=report_id, source=url)
+
+
+    def _remaining(self, deadline: Optional[float]) -> float:
+        """
+        Seconds left until `deadline` (inf if None).
+
+        :raises ReportTimeoutException: If the deadline has passed
+        """
+        if deadline is None:
+            return float("inf")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ReportTimeoutException
+        return remaining
         
 
-    def _parse_report(self, report_html: str) -> Union[CheckHostReport, InvalidReport]:
+    def _parse_report(
+            self,
+            report_html: str,
+            fields: Optional[Iterable[str]] = None,
+            countries: Optional[Iterable[str]] = None,
+            report_id: Optional[str] = None,
+            source: Optional[str] = None) -> Union[CheckHostReport, InvalidReport, FailedReport]:
         """
         Parses the HTML of a check-host.net report and returns
         a CheckHostReport object.
+
+        Fields left out of `fields` are not parsed and are left as None. When
+        "results" is left out, the results table is not parsed at all.
+
+        If the page can't be parsed, a FailedReport is returned instead.
         
         :param report_html: The full HTML of the report page
+        :param fields: Optional subset of REPORT_FIELDS to populate (default: all)
+        :param countries: Optional country codes to restrict the results to (default: all)
+        :param report_id: The ID of the report, if known, for a FailedReport
+        :param source: Where the HTML came from (e.g., URL or file name), for a FailedReport
         :return: CheckHostReport object
         """
+        fields = self._normalise_fields(fields)
+        countries = self._normalise_countries(countries)
         soup = BeautifulSoup(report_html, "html.parser")
+        try:
+            return self._parse_soup(soup, fields, countries)
+        except PARSE_ERRORS as e:
+            if report_id is None:
+                try:
+                    report_id = self._parse_report_id(soup)
+                except PARSE_ERRORS:
+                    pass
+            return self._failed_report(report_html, e, report_id, source)
+
+
+    def _failed_report(
+            self,
+            report_html: str,
+            error: Exception,
+            report_id: Optional[str],
+            source: Optional[str]) -> FailedReport:
+        """
+        Records a page that couldn't be parsed, saving its HTML to
+        `failed_html_dir` if set.
+        """
+        html_path = None
+        if self.failed_html_dir is not None:
+            name = report_id or hashlib.sha1(report_html.encode()).hexdigest()
+            html_path = self.failed_html_dir / f"{name}.html"
+            self.failed_html_dir.mkdir(parents=True, exist_ok=True)
+            html_path.write_text(report_html)
+
+        return FailedReport.from_exception(
+            error,
+            report_id=report_id,
+            source=source,
+            html_path=None if html_path is None else str(html_path),
+        )
+
+
+    def _parse_soup(
+            self,
+            soup: BeautifulSoup,
+            fields: set[str],
+            countries: Optional[set[str]]) -> Union[CheckHostReport, InvalidReport]:
+        """
+        See _parse_report. Takes already normalised `fields` and `countries`,
+        and raises one of PARSE_ERRORS if the page can't be parsed.
+        """
         report_id = self._parse_report_id(soup)
 
         try:        
@@ -100,17 +343,37 @@ class CheckHostReportScraper:
                 reason=e.message,
             )
         
-        report_type = self._parse_type(soup)
+        # The results can't be interpreted without their type, so it comes with them
+        report_type = None
+        if "report_type" in fields or "results" in fields:
+            report_type = self._parse_type(soup)
+
         return CheckHostReport(
             report_id=report_id,
-            permalink=self._parse_report_permalink(soup),
+            permalink=self._parse_report_permalink(soup) if "permalink" in fields else None,
             report_type=report_type,
-            target=self._parse_target(soup),
-            date=self._parse_checked_on_datetime(soup),
-            results=self._parse_results(soup, report_type),
+            target=self._parse_target(soup) if "target" in fields else None,
+            date=self._parse_checked_on_datetime(soup) if "date" in fields else None,
+            results=self._parse_results(soup, report_type, countries) if "results" in fields else None,
         )
 
 
+    def _normalise_fields(self, fields: Optional[Iterable[str]]) -> set[str]:
+        if fields is None:
+            return set(REPORT_FIELDS)
+        fields = set(fields)
+        unknown = fields - set(REPORT_FIELDS) - {"report_id"}
+        if unknown:
+            raise ValueError(f"Unknown report fields: {sorted(unknown)}")
+        return fields
+
+
+    def _normalise_countries(self, countries: Optional[Iterable[str]]) -> Optional[set[str]]:
+        if countries is None:
+            return None
+        return {c.upper() for c in countries}
+
+
     def _check_valid(self, soup: BeautifulSoup) -> Optional[str]:
         """
         Example html element to parse:
@@ -123,20 +386,54 @@ class CheckHostReportScraper:
         return None
 
 
-    def _parse_results(self, soup: BeautifulSoup, report_type: str) -> List[REPORT_TYPE]:
+    def _parse_results(
+            self,
+            soup: BeautifulSoup,
+            report_type: str,
+            countries: Optional[set[str]] = None) -> List[REPORT_TYPE]:
         """
         Parses the results of a check-host.net report and returns
         a list of result objects.
 
         :param soup: BeautifulSoup object of the report page
         :param report_type: The type of report to parse
+        :param countries: Optional (upper-case) country codes to restrict the results to
         :return: List of result objects
         """
         if report_type not in self.check_report_funcs:
-            raise ValueError(f"Unknown report type: {report_type}")
-        return self.check_report_funcs[report_type](soup)
+            raise ReportParseException(f"Unknown report type: {report_type}")
+        return self.check_report_funcs[report_type](soup, countries)
         
 
+    def _iter_result_rows(self, soup: BeautifulSoup, expected_headers: List[str], countries: Optional[set[str]]):
+        """
+        Yields (row, location <td>, country code) for each row of the results
+        table, skipping rows whose country is not in `countries` before any
+        further cells are looked up.
+
+        Cells are looked up by their class (or id), not their position, so
+        the table's columns may be reordered, and extra columns are ignored.
+        Only missing columns are an error.
+        """
+        table = soup.find("table")
+        if table is None:
+            raise ReportParseException("No results table")
+        headers = [th.text.strip() for th in table.find('thead').find('tr').find_all('th')]
+        rows = table.find("tbody").find_all("tr", recursive=False)
+
+        # Check that every expected column is present
+        missing = [h for h in expected_headers if h not in headers]
+        if missing:
+            raise ReportParseException(f"Missing result columns: {missing}")
+
+        for row in rows:
+            loc_td = row.find("td", class_="location")
+            country_code = loc_td.find("img")['alt'].upper()
+            if countries is not None and country_code not in countries:
+                continue
+            yield row, loc_td, country_code
+
+
     def _parse_type(self, soup: BeautifulSoup) -> str:
         """
         Example html element to parse:
@@ -153,7 +450,7 @@ class CheckHostReportScraper:
         if extracted_type in self.check_report_map:
             return self.check_report_map[extracted_type]
         else:
-            raise ValueError(f"Unknown report type: {extracted_type}")
+            raise ReportParseException(f"Unknown report type: {extracted_type}")
     
 
     def _parse_report_id(self, soup: BeautifulSoup) -> str:
@@ -211,7 +508,7 @@ class CheckHostReportScraper:
         return None
     
 
-    def _parse_check_http_results(self, soup: str) -> list[CheckHttpReportResult]:
+    def _parse_check_http_results(self, soup: str, countries: Optional[set[str]] = None) -> list[CheckHttpReportResult]:
         """
         :param soup: BeautifulSoup object of the report page. Note that JavaScript
          is used to populate the tabled data, so we need to make sure the page source
@@ -233,19 +530,11 @@ class CheckHostReportScraper:
                 <td class="ip" id="result_ip_cz1.node.check-host.net"><div>1.1.1.1</div></td>
                 ...
         """
-        table = soup.find("table") 
-        headers = [th.text for th in table.find('thead').find('tr').find_all('th')]
-        rows = table.find("tbody").find_all("tr", recursive=False)
-
-        # Check if table headers are as expected
-        assert headers == EXPECTED_HTTP_REPORT_HEADERS
-
         results = []
-        for row in rows:
-            loc_td = row.find("td", class_="location")
+        for row, loc_td, country_code in self._iter_result_rows(soup, EXPECTED_HTTP_REPORT_HEADERS, countries):
             results.append(
                 CheckHttpReportResult(
-                    country_code=loc_td.find("img")['alt'].upper(),
+                    country_code=country_code,
                     location=loc_td.find("span").text,
                     result=row.find("td", class_="result").text,
                     time=row.find("td", class_="time").text,
@@ -256,29 +545,21 @@ class CheckHostReportScraper:
         return results
     
 
-    def _parse_check_dns_results(self, soup: str) -> list[CheckDnsReportResult]:
+    def _parse_check_dns_results(self, soup: str, countries: Optional[set[str]] = None) -> list[CheckDnsReportResult]:
         """
         :param soup: BeautifulSoup object of the report page. Note that JavaScript
          is used to populate the tabled data, so we need to make sure the page source
          has first been rendered (e.g., with Selenium) before parsing the results.
         """
-        table = soup.find("table")
-        headers = [th.text for th in table.find('thead').find('tr').find_all('th')]
-        rows = table.find("tbody").find_all("tr", recursive=False)
-
-        # Check if table headers are as expected
-        assert headers == EXPECTED_DNS_REPORT_HEADERS
-
         results = []
-        for row in rows:
-            loc_td = row.find("td", class_="location")
+        for row, loc_td, country_code in self._iter_result_rows(soup, EXPECTED_DNS_REPORT_HEADERS, countries):
             # Convert CSV "results" to a set
             result_csv_str = row.find("td", class_="result").text
             result_set = set([x.strip() for x in result_csv_str.split(",")])
 
             results.append(
                 CheckDnsReportResult(
-                    country_code=loc_td.find("img")['alt'].upper(),
+                    country_code=country_code,
                     location=loc_td.find("span").text,
                     result=result_set,
                     ttl=row.find("td", class_="ttl").text
@@ -287,29 +568,21 @@ class CheckHostReportScraper:
         return results
 
 
-    def _parse_check_ping_results(self, soup: str) -> list[CheckPingReportResult]:
+    def _parse_check_ping_results(self, soup: str, countries: Optional[set[str]] = None) -> list[CheckPingReportResult]:
         """
         :param soup: BeautifulSoup object of the report page. Note that JavaScript
          is used to populate the tabled data, so we need to make sure the page source
          has first been rendered (e.g., with Selenium) before parsing the results.
         """
-        table = soup.find("table")
-        headers = [th.text for th in table.find('thead').find('tr').find_all('th')]
-        rows = table.find("tbody").find_all("tr", recursive=False)
-
-        # Check if table headers are as expected
-        assert headers == EXPECTED_PING_REPORT_HEADERS
-
         results = []
-        for row in rows:
-            loc_td = row.find("td", class_="location")
+        for row, loc_td, country_code in self._iter_result_rows(soup, EXPECTED_PING_REPORT_HEADERS, countries):
 
             # The "ip" <td> is identified with an id starting with "result_ip_"
             ip_td = [t for t in row.find_all("td") if t.get("id", "").startswith("result_ip_")][0]
 
             results.append(
                 CheckPingReportResult(
-                    country_code=loc_td.find("img")['alt'].upper(),
+                    country_code=country_code,
                     location=loc_td.find("span").text,
                     result=row.find("td", class_="result").text,
                     rtt=row.find("td", class_="rtt").text,
@@ -319,29 +592,21 @@ class CheckHostReportScraper:
         return results
 
 
-    def _parse_check_tcp_results(self, soup: str) -> list[CheckTcpReportResult]:
+    def _parse_check_tcp_results(self, soup: str, countries: Optional[set[str]] = None) -> list[CheckTcpReportResult]:
         """
         :param soup: BeautifulSoup object of the report page. Note that JavaScript
          is used to populate the tabled data, so we need to make sure the page source
          has first been rendered (e.g., with Selenium) before parsing the results.
         """
-        table = soup.find("table")
-        headers = [th.text for th in table.find('thead').find('tr').find_all('th')]
-        rows = table.find("tbody").find_all("tr", recursive=False)
-
-        # Check if table headers are as expected
-        assert headers == EXPECTED_TCP_REPORT_HEADERS
-
         results = []
-        for row in rows:
-            loc_td = row.find("td", class_="location")
+        for row, loc_td, country_code in self._iter_result_rows(soup, EXPECTED_TCP_REPORT_HEADERS, countries):
 
             # The "time" <td> is identified with an id starting with "result_time_"
             time_td = [t for t in row.find_all("td") if t.get("id", "").startswith("result_time_")][0]
 
             results.append(
                 CheckTcpReportResult(
-                    country_code=loc_td.find("img")['alt'].upper(),
+                    country_code=country_code,
                     location=loc_td.find("span").text,
                     result=row.find("td", class_="result").text,
                     time=time_td.text,
@@ -351,25 +616,17 @@ class CheckHostReportScraper:
         return results
 
 
-    def _parse_check_udp_results(self, soup: str) -> list[CheckUdpReportResult]:
+    def _parse_check_udp_results(self, soup: str, countries: Optional[set[str]] = None) -> list[CheckUdpReportResult]:
         """
         :param soup: BeautifulSoup object of the report page. Note that JavaScript
          is used to populate the tabled data, so we need to make sure the page source
          has first been rendered (e.g., with Selenium) before parsing the results.
         """
-        table = soup.find("table")
-        headers = [th.text for th in table.find('thead').find('tr').find_all('th')]
-        rows = table.find("tbody").find_all("tr", recursive=False)
-
-        # Check if table headers are as expected
-        assert headers == EXPECTED_UDP_REPORT_HEADERS
-        
         results = []
-        for row in rows:
-            loc_td = row.find("td", class_="location")
+        for row, loc_td, country_code in self._iter_result_rows(soup, EXPECTED_UDP_REPORT_HEADERS, countries):
             results.append(
                 CheckUdpReportResult(
-                    country_code=loc_td.find("img")['alt'].upper(),
+                    country_code=country_code,
                     location=loc_td.find("span").text,
                     result=row.find("td", class_="result").text,
                     ip=row.find("td", class_="ip").text
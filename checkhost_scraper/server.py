@@ -0,0 +1,159 @@
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .pool import ScraperPool
+from .scraper import REPORT_FIELDS
+from .models import FailedReport, PoolBusyException, ReportTimeoutException
+
+
+REPORT_ID_PATTERN = re.compile(r"^[A-Za-z0-9]+$")
+MAX_BATCH_SIZE = 1000
+MAX_BODY_SIZE = 1 << 20 # Bytes. Far more than MAX_BATCH_SIZE report IDs need
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes:
+        GET  /health            Pool status
+        GET  /report/{id}       Single report, as CheckHostReport.model_dump_json()
+        POST /reports           Batch of reports. Body: {"report_ids": ["...", ...]}
+                                Returns a JSON list of reports, in request order.
+
+    Report routes accept optional `fields` and `countries` query parameters
+    (comma-separated), which are passed on to CheckHostReportScraper.scrape.
+    """
+    server_version = "checkhost-scraper"
+
+    def do_GET(self):
+        path, scrape_kwargs = self._parse_path()
+        if path == "/health":
+            self._send_json(200, json.dumps({"status": "ok", **self.server.pool.stats()}))
+        elif path.startswith("/report/"):
+            report_id = path[len("/report/"):]
+            if not REPORT_ID_PATTERN.match(report_id):
+                self._send_error(400, "Invalid report ID")
+                return
+            if not self._check_fields(scrape_kwargs):
+                return
+            self._scrape_and_respond(
+                lambda pool: pool.scrape(report_id, timeout=self.server.report_timeout, **scrape_kwargs).model_dump_json()
+            )
+        else:
+            self._send_error(404, "Not found")
+
+
+    def do_POST(self):
+        path, scrape_kwargs = self._parse_path()
+        if path != "/reports":
+            self._send_error(404, "Not found")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_error(400, "Invalid Content-Length")
+            return
+        if length > MAX_BODY_SIZE:
+            self._send_error(413, f"Request bodies are limited to {MAX_BODY_SIZE} bytes")
+            return
+
+        try:
+            report_ids = json.loads(self.rfile.read(length))["report_ids"]
+        except (ValueError, KeyError, TypeError):
+            self._send_error(400, "Body must be JSON of the form {\"report_ids\": [...]}")
+            return
+
+        if not isinstance(report_ids, list) or not all(
+                isinstance(_id, str) and REPORT_ID_PATTERN.match(_id) for _id in report_ids):
+            self._send_error(400, "Invalid report ID")
+            return
+        # A batch is admitted to the pool all at once, so one bigger than the pool
+        # can hold would be turned away (503) even when the pool is idle
+        max_batch_size = min(MAX_BATCH_SIZE, self.server.pool.size + self.server.pool.max_queue)
+        if len(report_ids) > max_batch_size:
+            self._send_error(413, f"Batches are limited to {max_batch_size} reports")
+            return
+        if not self._check_fields(scrape_kwargs):
+            return
+
+        def scrape_batch(pool: ScraperPool) -> str:
+            results = pool.scrape_many(report_ids, timeout=self.server.report_timeout, return_exceptions=True, **scrape_kwargs)
+            reports = []
+            for report_id, result in zip(report_ids, results):
+                # A report that timed out (or otherwise errored) is recorded in place,
+                # so the rest of the batch is still returned
+                if isinstance(result, Exception):
+                    result = FailedReport.from_exception(result, report_id=report_id)
+                reports.append(result.model_dump_json())
+            return "[" + ",".join(reports) + "]"
+
+        self._scrape_and_respond(scrape_batch)
+
+
+    def _parse_path(self) -> tuple[str, dict]:
+        parsed = urlsplit(self.path)
+        query = parse_qs(parsed.query)
+        scrape_kwargs = {}
+        for key in ("fields", "countries"):
+            if key in query:
+                scrape_kwargs[key] = [v for v in ",".join(query[key]).split(",") if v]
+        return parsed.path.rstrip("/"), scrape_kwargs
+
+
+    def _check_fields(self, scrape_kwargs: dict) -> bool:
+        unknown = set(scrape_kwargs.get("fields", [])) - set(REPORT_FIELDS) - {"report_id"}
+        if unknown:
+            self._send_error(400, f"Unknown report fields: {sorted(unknown)}")
+            return False
+        return True
+
+
+    def _scrape_and_respond(self, scrape_func: Callable[[ScraperPool], str]):
+        try:
+            body = scrape_func(self.server.pool)
+        except PoolBusyException as e:
+            self._send_error(503, e.message)
+        except ReportTimeoutException as e:
+            self._send_error(504, e.message)
+        except Exception as e:
+            self.log_error("Scrape failed: %r", e)
+            self._send_error(500, "Scrape failed")
+        else:
+            self._send_json(200, body)
+
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, json.dumps({"error": message}))
+
+
+    def _send_json(self, status: int, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_server(
+        pool: ScraperPool,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        report_timeout: Optional[float] = None) -> ThreadingHTTPServer:
+    """
+    Creates (but does not start) an HTTP server that serves reports from `pool`.
+    `report_timeout` is the deadline, in seconds, for scraping each report.
+
+    >>> server = make_server(ScraperPool(size=4), port=8080)
+    >>> server.serve_forever()
+    """
+    server = ThreadingHTTPServer((host, port), ReportRequestHandler)
+    server.daemon_threads = True
+    server.pool = pool
+    server.report_timeout = report_timeout
+    return server
@@ -1,28 +1,83 @@
 import argparse
+import sys
+from collections import Counter
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Union
 
-from checkhost_scraper.scraper import CheckHostReportScraper
+from checkhost_scraper.scraper import CheckHostReportScraper, REPORT_FIELDS
+from checkhost_scraper.models import CheckHostReport, InvalidReport, FailedReport
+from checkhost_scraper.reparse import reparse
+from checkhost_scraper.pool import ScraperPool
 
 
-def process(scraper: CheckHostReportScraper, inputs: list[str], output_path: Optional[Path]):
+REPORT = Union[CheckHostReport, InvalidReport, FailedReport]
+
+
+def process(scraper: CheckHostReportScraper, inputs: list[str], output_path: Optional[Path], **scrape_kwargs) -> Counter:
+    return write((_scrape(scraper, report_id, **scrape_kwargs) for report_id in inputs), output_path)
+
+
+def process_in_pool(pool: ScraperPool, inputs: list[str], output_path: Optional[Path], **scrape_kwargs) -> Counter:
+    # Each report is written as soon as it (and those before it) are done, as in `process`
+    results = pool.iter_scrape(inputs, return_exceptions=True, **scrape_kwargs)
+    return write((_as_failed(report_id, result) for report_id, result in zip(inputs, results)), output_path)
+
+
+def _scrape(scraper: CheckHostReportScraper, report_id: str, **scrape_kwargs) -> REPORT:
+    try:
+        return scraper.scrape(report_id, **scrape_kwargs)
+    except Exception as e:
+        return _as_failed(report_id, e)
+
+
+def _as_failed(report_id: str, result: Union[REPORT, Exception]) -> REPORT:
+    # A report that timed out (or otherwise errored) is recorded as failed, so the rest of the batch carries on
+    if isinstance(result, Exception):
+        return FailedReport.from_exception(result, report_id=report_id)
+    return result
+
+
+def write(reports: Iterable[REPORT], output_path: Optional[Path]) -> Counter:
+    """
+    Writes reports as JSON lines, and returns how many of each kind
+    (CheckHostReport, InvalidReport, FailedReport) were written.
+    """
     if output_path:
-        _process_to_file(scraper, inputs, Path(output_path))
+        return _write_to_file(reports, Path(output_path))
     else:
-        _process_to_stdout(scraper, inputs)
+        return _write_to_stdout(reports)
 
 
-def _process_to_stdout(scraper: CheckHostReportScraper, inputs: list[str]):
-    for report_id in inputs:
-        report = scraper.scrape(report_id)
+def _write_to_stdout(reports: Iterable[REPORT]) -> Counter:
+    counts = Counter()
+    for report in reports:
         print(report.model_dump_json())
+        counts[type(report).__name__] += 1
+    return counts
 
 
-def _process_to_file(scraper: CheckHostReportScraper, inputs: list[str], output_path: Path):
+def _write_to_file(reports: Iterable[REPORT], output_path: Path) -> Counter:
+    counts = Counter()
     with open(output_path, "w") as out_f:
-        for report_id in inputs:
-            report = scraper.scrape(report_id)
+        for report in reports:
             out_f.write(report.model_dump_json() + "\n")
+            counts[type(report).__name__] += 1
+    return counts
+
+
+def _print_summary(counts: Counter):
+    print(
+        f"Reports: {counts['CheckHostReport']} parsed, {counts['InvalidReport']} invalid, "
+        f"{counts['FailedReport']} failed",
+        file=sys.stderr,
+    )
+
+
+def _split_csv(value: Optional[str]) -> Optional[list[str]]:
+    if value is None:
+        return None
+    return [v.strip() for v in value.split(",") if v.strip()]
 
 
 def main():
@@ -30,17 +85,64 @@ def main():
     parser.add_argument("--report_id", type=str, help="The permalink ID of the report to scrape", required=False)
     parser.add_argument("--report_ids_file", type=str, help="The file containing the report IDs to scrape, one per line", required=False)
     parser.add_argument("--output_file", type=str, help="JSON lines file to write the scraped reports to", required=False)
+    parser.add_argument("--fields", type=str, help="Comma-separated report fields to include, e.g. report_type,target,date (default: all)", required=False)
+    parser.add_argument("--countries", type=str, help="Comma-separated country codes to include results for, e.g. BR,VN (default: all)", required=False)
+    parser.add_argument("--reparse", type=str, help="Parse saved report HTML from a directory, tarball or WARC file instead of scraping", required=False)
+    parser.add_argument("--workers", type=int, help="Number of scrapers (browsers) to run in parallel, or of processes with --reparse (default: 1, or one per CPU with --reparse)", required=False)
+    parser.add_argument("--tiered_fetch", action="store_true", help="Try a plain HTTP fetch before rendering reports in the browser")
+    parser.add_argument("--timeout", type=float, help="Deadline, in seconds, for scraping each report. Reports that miss it are written as failed", required=False)
+    parser.add_argument("--debugger_address", type=str, help="Attach to an already-running Chrome at this debugger address (e.g. 127.0.0.1:9222) instead of launching one", required=False)
+    parser.add_argument("--remote_url", type=str, help="Drive the browser through this remote WebDriver endpoint (e.g. http://127.0.0.1:4444)", required=False)
+    parser.add_argument("--failed_html_dir", type=str, help="Directory to save the HTML of reports that can't be parsed", required=False)
+    parser.add_argument("--hedge_percentile", type=float, help="With --workers, send a report to a second scraper once it has taken longer than this percentile of recent scrapes, e.g. 95", required=False)
     args = parser.parse_args()
 
-    scraper = CheckHostReportScraper()
+    scrape_kwargs = {"fields": _split_csv(args.fields), "countries": _split_csv(args.countries)}
+    unknown_fields = set(scrape_kwargs["fields"] or []) - set(REPORT_FIELDS) - {"report_id"}
+    if unknown_fields:
+        parser.error(f"Unknown report fields: {sorted(unknown_fields)}")
     
+    if args.reparse:
+        reports = reparse(args.reparse, workers=args.workers, failed_html_dir=args.failed_html_dir, **scrape_kwargs)
+        _print_summary(write(reports, args.output_file))
+        return
+
     if args.report_id:
-        process(scraper, [args.report_id], args.output_file)    
+        report_ids = [args.report_id]
     elif args.report_ids_file:
         report_ids = [_id.strip() for _id in Path(args.report_ids_file).read_text().splitlines() if _id.strip()]
-        process(scraper, report_ids, args.output_file)
     else:
-        parser.error("Either --report_id or --report_ids_file must be provided")
+        parser.error("One of --report_id, --report_ids_file or --reparse must be provided")
+
+    scrape_kwargs["timeout"] = args.timeout
+    scraper_factory = partial(
+        CheckHostReportScraper,
+        tiered_fetch=args.tiered_fetch,
+        failed_html_dir=args.failed_html_dir,
+        debugger_address=args.debugger_address,
+        remote_url=args.remote_url,
+    )
+    if args.hedge_percentile is not None and not (args.workers and args.workers > 1):
+        parser.error("--hedge_percentile needs --workers of 2 or more")
+    if args.workers and args.workers > 1:
+        pool = ScraperPool(
+            size=args.workers,
+            max_queue=args.workers,
+            scraper_factory=scraper_factory,
+            hedge_percentile=args.hedge_percentile,
+        )
+        counts = process_in_pool(pool, report_ids, args.output_file, **scrape_kwargs)
+        fetch_counts = pool.stats()["fetch_counts"]
+        pool.close()
+    else:
+        scraper = scraper_factory()
+        counts = process(scraper, report_ids, args.output_file, **scrape_kwargs)
+        fetch_counts = dict(scraper.fetch_counts)
+        scraper.close()
+
+    _print_summary(counts)
+    if args.tiered_fetch:
+        print(f"Reports fetched by tier: {fetch_counts}", file=sys.stderr)
 
 
 if __name__ == "__main__":
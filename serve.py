@@ -0,0 +1,45 @@
+import argparse
+from functools import partial
+
+from checkhost_scraper.scraper import CheckHostReportScraper
+from checkhost_scraper.pool import ScraperPool
+from checkhost_scraper.server import make_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve check-host reports over HTTP from a pool of warm scrapers")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="The interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="The port to listen on")
+    parser.add_argument("--workers", type=int, default=2, help="The number of scrapers (browsers) to keep warm")
+    parser.add_argument("--max_queue", type=int, default=64, help="The number of reports allowed to wait for a free scraper")
+    parser.add_argument("--tiered_fetch", action="store_true", help="Try a plain HTTP fetch before rendering reports in the browser")
+    parser.add_argument("--timeout", type=float, help="Deadline, in seconds, for scraping each report", required=False)
+    parser.add_argument("--hedge_percentile", type=float, help="Send a report to a second scraper once it has taken longer than this percentile of recent scrapes, e.g. 95", required=False)
+    parser.add_argument("--debugger_address", type=str, help="Attach every scraper to an already-running Chrome at this debugger address (e.g. 127.0.0.1:9222), one tab each", required=False)
+    parser.add_argument("--remote_url", type=str, help="Drive the browser through this remote WebDriver endpoint (e.g. http://127.0.0.1:4444)", required=False)
+    args = parser.parse_args()
+
+    scraper_factory = partial(
+        CheckHostReportScraper,
+        tiered_fetch=args.tiered_fetch,
+        debugger_address=args.debugger_address,
+        remote_url=args.remote_url,
+    )
+    pool = ScraperPool(
+        size=args.workers,
+        max_queue=args.max_queue,
+        scraper_factory=scraper_factory,
+        hedge_percentile=args.hedge_percentile,
+    )
+    server = make_server(pool, args.host, args.port, report_timeout=args.timeout)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
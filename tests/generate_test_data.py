@@ -1,7 +1,7 @@
-from selenium import webdriver
+import argparse
 from pathlib import Path
 
-from checkhost_scraper.scraper import CheckHostReport
+from checkhost_scraper.scraper import CheckHostReport, CheckHostReportScraper
 from checkhost_scraper.models import (
     CheckHostReport,
     InvalidReport,
@@ -15,20 +15,16 @@ from checkhost_scraper.models import (
 
 TEST_DATA_DIR = Path(__file__).parent / "data"
 
-# Set-up selenium driver
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")
-driver = webdriver.Chrome(options=options)
+# Selenium-based scraper. The browser is only launched (or attached to) when a page is first fetched,
+# so importing this module for the expected reports doesn't start one.
+scraper = CheckHostReportScraper()
 
 
 def _get_source(url: str) -> str:
     """
     Fetches the HTML source of a webpage and returns it as a string."
     """
-    # Selenium-based implementation
-    driver.get(url)
-    response_text = driver.page_source
-    return response_text
+    return scraper._get_source(url)
 
 
 def dump_example_report_html__check_http():
@@ -220,12 +216,20 @@ def get_example_response__invalid_report_id() -> InvalidReport:
 
 
 def main():
+    global scraper
+    parser = argparse.ArgumentParser(description="Re-download the example report pages used by the tests")
+    parser.add_argument("--debugger_address", type=str, help="Attach to an already-running Chrome at this debugger address (e.g. 127.0.0.1:9222)", required=False)
+    parser.add_argument("--remote_url", type=str, help="Drive the browser through this remote WebDriver endpoint", required=False)
+    args = parser.parse_args()
+    scraper = CheckHostReportScraper(debugger_address=args.debugger_address, remote_url=args.remote_url)
+
     dump_example_report_html__check_http()
     dump_example_report_html__check_ping()
     dump_example_report_html__check_tcp()
     dump_example_report_html__check_udp()
     dump_example_report_html__check_dns()
     dump_example_response__invalid_report_id()
+    scraper.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+import pytest
+from pathlib import Path
+
+np = pytest.importorskip("numpy")
+from checkhost_scraper.aggregate import ReportColumns, group_stats, status_code_histogram
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+@pytest.fixture(scope="module")
+def columns():
+    return ReportColumns.from_jsonl(TEST_DATA_DIR / "example_outputs.jsonl")
+
+
+def test_from_jsonl(columns: ReportColumns):
+    assert set(columns.categories["report_type"]) == {"check-http", "check-dns", "check-ping"}
+    http = columns.select(report_type="check-http")
+    assert len(http) == 46
+    assert np.isnan(http.rtt_avg).all()
+
+
+def test_group_stats_matches_numpy(columns: ReportColumns):
+    http = columns.select(report_type="check-http")
+    stats = group_stats(http, by="country_code", value="time")
+
+    br = http.select(country_code="BR")
+    times = br.time[~np.isnan(br.time)]
+    assert stats["BR"]["count"] == len(br)
+    assert stats["BR"]["success_ratio"] == pytest.approx(br.success.mean())
+    assert stats["BR"]["min"] == pytest.approx(times.min())
+    assert stats["BR"]["max"] == pytest.approx(times.max())
+    assert stats["BR"]["mean"] == pytest.approx(times.mean())
+    assert stats["BR"]["p95"] == pytest.approx(np.percentile(times, 95))
+
+
+def test_group_stats_ping_rtt(columns: ReportColumns):
+    ping = columns.select(report_type="check-ping")
+    stats = group_stats(ping, by="location", value="rtt_avg")
+    assert stats["Brazil, Sao Paulo"]["mean"] == pytest.approx(1.8)
+    assert stats["Brazil, Sao Paulo"]["success_ratio"] == 1.0
+
+
+def test_status_code_histogram(columns: ReportColumns):
+    histogram = status_code_histogram(columns.select(report_type="check-http"), by="report_type")
+    assert sum(histogram["check-http"].values()) == 46
+    assert histogram["check-http"][301] > 0
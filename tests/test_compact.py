@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+from checkhost_scraper.compact import CompactReportCollection
+from checkhost_scraper.models import CheckHostReport, InvalidReport
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+
+
+def test_roundtrip_jsonl():
+    lines = (TEST_DATA_DIR / "example_outputs.jsonl").read_text().splitlines()
+    expected = [CheckHostReport.model_validate_json(line) for line in lines]
+    collection = CompactReportCollection.from_jsonl(TEST_DATA_DIR / "example_outputs.jsonl")
+    assert len(collection) == len(expected)
+    assert list(collection) == expected
+    assert collection[1].model_dump_json() == lines[1]
+
+
+def test_values_are_shared():
+    reports = [
+        CheckHostReport.model_validate_json(line)
+        for line in (TEST_DATA_DIR / "example_outputs.jsonl").read_text().splitlines()
+    ]
+    collection = CompactReportCollection.from_reports(reports + reports)
+    n_cells = sum(len(r.results) * len(type(r.results[0]).model_fields) for r in reports)
+    assert len(collection.pool) < n_cells / 2
+
+
+def test_invalid_report():
+    collection = CompactReportCollection()
+    collection.append(InvalidReport(report_id="doesntexist", reason="Report not found"))
+    collection.append(json.loads('{"report_id": "doesntexist", "reason": "Report not found"}'))
+    assert list(collection) == [InvalidReport(report_id="doesntexist", reason="Report not found")] * 2
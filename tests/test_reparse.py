@@ -0,0 +1,78 @@
+import tarfile
+from pathlib import Path
+
+import pytest
+from generate_test_data import (
+    get_example_report__check_http,
+    get_example_report__check_dns,
+)
+from checkhost_scraper.reparse import iter_archive, reparse
+from checkhost_scraper.models import FailedReport
+
+
+TEST_DATA_DIR = Path(__file__).parent / "data"
+EXAMPLE_PAGES = [
+    "example_report__check_http_23d52df5k770.html",
+    "example_report__check_dns_23e21752kd44.html",
+]
+
+
+@pytest.fixture(scope="module")
+def expected_reports():
+    return [get_example_report__check_http(), get_example_report__check_dns()]
+
+
+@pytest.fixture
+def tarball(tmp_path: Path) -> Path:
+    path = tmp_path / "reports.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        for name in EXAMPLE_PAGES:
+            tar.add(TEST_DATA_DIR / name, arcname=f"reports/{name}")
+    return path
+
+
+def _warc_record(http: bytes, uri: str = "https://check-host.net/") -> bytes:
+    return (
+        b"WARC/1.0\r\n"
+        b"WARC-Type: response\r\n"
+        + f"WARC-Target-URI: {uri}\r\n".encode()
+        + b"Content-Type: application/http; msgtype=response\r\n"
+        + f"Content-Length: {len(http)}\r\n\r\n".encode()
+        + http + b"\r\n\r\n"
+    )
+
+
+@pytest.fixture
+def warc(tmp_path: Path) -> Path:
+    path = tmp_path / "reports.warc"
+    with open(path, "wb") as f:
+        for name in EXAMPLE_PAGES:
+            f.write(_warc_record(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n" + (TEST_DATA_DIR / name).read_bytes()))
+    return path
+
+
+@pytest.mark.parametrize("archive", ["tarball", "warc"])
+def test_iter_archive(archive: str, request: pytest.FixtureRequest):
+    pages = [html for _, html in iter_archive(request.getfixturevalue(archive))]
+    assert pages == [(TEST_DATA_DIR / name).read_text() for name in EXAMPLE_PAGES]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reparse(tarball: Path, workers: int, expected_reports: list):
+    reports = list(reparse(tarball, workers=workers))
+    assert [r.report_id for r in reports] == [r.report_id for r in expected_reports]
+    assert reports[0].results[0] == expected_reports[0].results[0]
+    assert reports[1].results[-1] == expected_reports[1].results[-1]
+
+
+
+def test_iter_archive_corrupt_warc_record(tmp_path: Path):
+    path = tmp_path / "reports.warc"
+    path.write_bytes(
+        _warc_record(b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\n\r\nnot gzip", uri="https://check-host.net/bad")
+        + _warc_record(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n<html></html>")
+    )
+    (bad_name, bad), (_, good) = iter_archive(path)
+    assert isinstance(bad, FailedReport)
+    assert bad_name == bad.source == "https://check-host.net/bad"
+    assert good == "<html></html>"
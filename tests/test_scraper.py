@@ -9,7 +9,9 @@ from generate_test_data import (
     get_example_response__invalid_report_id,
 )
 from checkhost_scraper.scraper import CheckHostReportScraper
-from checkhost_scraper.models import CheckHostReport
+from checkhost_scraper.models import CheckHostReport, FailedReport, ReportTimeoutException
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
 
 
 TEST_DATA_DIR = Path(__file__).parent / "data"
@@ -72,3 +74,149 @@ def test_invalid_report(scraper: CheckHostReportScraper):
     expected_report = get_example_response__invalid_report_id()
     obtained_report = scraper._parse_report(page_html)
     assert obtained_report == expected_report
+
+
+def test_metadata_only_projection(scraper: CheckHostReportScraper):
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    expected_report = get_example_report__check_http()
+    obtained_report = scraper._parse_report(page_html, fields=["report_type", "target", "date"])
+    assert obtained_report.report_type == expected_report.report_type
+    assert obtained_report.target == expected_report.target
+    assert obtained_report.date == expected_report.date
+    assert obtained_report.permalink is None
+    assert obtained_report.results is None
+
+
+def test_results_projection_keeps_report_type(scraper: CheckHostReportScraper):
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    expected_report = get_example_report__check_http()
+    obtained_report = scraper._parse_report(page_html, fields=["results"])
+    assert obtained_report.report_type == expected_report.report_type
+    assert obtained_report.results[0] == expected_report.results[0]
+    assert obtained_report.target is None
+
+
+def test_countries_projection(scraper: CheckHostReportScraper):
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    expected_report = get_example_report__check_http()
+    obtained_report = scraper._parse_report(page_html, countries=["br", "VN"])
+    assert {r.country_code for r in obtained_report.results} == {"BR", "VN"}
+    assert obtained_report.results[0] == expected_report.results[0]
+    assert obtained_report.results[-1] == expected_report.results[-1]
+
+
+class FakeSession:
+    def __init__(self, page_html: str):
+        self.page_html = page_html
+
+    def get(self, url: str, timeout: float):
+        return type("Response", (), {"status_code": 200, "text": self.page_html})()
+
+    def close(self):
+        pass
+
+
+def test_tiered_fetch_settles_invalid_report_over_http():
+    page_html = (TEST_DATA_DIR / "example_response__invalid_report_id.html").read_text()
+    scraper = CheckHostReportScraper(tiered_fetch=True)
+    scraper._session = FakeSession(page_html)
+    assert scraper.scrape("doesntexist") == get_example_response__invalid_report_id()
+    assert scraper.fetch_counts == {"http": 1}
+
+
+def test_tiered_fetch_metadata_only_over_http():
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    expected_report = get_example_report__check_http()
+    scraper = CheckHostReportScraper(tiered_fetch=True)
+    scraper._session = FakeSession(page_html)
+    obtained_report = scraper.scrape("23d52df5k770", fields=["report_type", "target", "date"])
+    assert obtained_report.target == expected_report.target
+    assert obtained_report.results is None
+    assert scraper.fetch_counts == {"http": 1}
+
+
+
+class StalledDriver:
+    def set_page_load_timeout(self, timeout: float):
+        self.timeout = timeout
+
+    def get(self, url: str):
+        raise TimeoutException
+
+
+def test_scrape_deadline():
+    scraper = CheckHostReportScraper()
+    scraper._driver = StalledDriver()
+    with pytest.raises(ReportTimeoutException):
+        scraper.scrape("23d52df5k770", timeout=5)
+    assert 0 < scraper._driver.timeout <= 5
+    assert scraper.fetch_counts["browser"] == 0  # A timed out fetch didn't resolve the report
+
+
+def test_reordered_and_extra_columns(scraper: CheckHostReportScraper):
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    soup = BeautifulSoup(page_html, "html.parser")
+    table = soup.find("table")
+    # Reverse every row's cells, and add an extra column at the end
+    for row in [table.find("thead").find("tr")] + table.find("tbody").find_all("tr", recursive=False):
+        cells = [cell.extract() for cell in row.find_all(["th", "td"], recursive=False)]
+        for cell in reversed(cells):
+            row.append(cell)
+        extra = soup.new_tag(cells[0].name)
+        extra.string = "Extra"
+        row.append(extra)
+
+    expected_report = get_example_report__check_http()
+    obtained_report = scraper._parse_report(str(soup))
+    _check_report_equals(obtained_report, expected_report)
+
+
+def test_missing_column_is_a_failed_report(tmp_path: Path):
+    page_html = (TEST_DATA_DIR / "example_report__check_http_23d52df5k770.html").read_text()
+    soup = BeautifulSoup(page_html, "html.parser")
+    [th for th in soup.find("table").find("thead").find_all("th") if th.text.strip() == "Code"][0].decompose()
+
+    scraper = CheckHostReportScraper(failed_html_dir=tmp_path)
+    obtained_report = scraper._parse_report(str(soup))
+    assert isinstance(obtained_report, FailedReport)
+    assert obtained_report.report_id == "23d52df5k770"
+    assert obtained_report.error == "ReportParseException"
+    assert Path(obtained_report.html_path).read_text() == str(soup)
+
+
+class FakeSharedChrome:
+    """
+    Stands in for webdriver.Chrome attached to an already-running browser.
+    """
+    def __init__(self, options):
+        self.options = options
+        self.windows = ["existing"]
+        self.current_window_handle = "existing"
+        self.quit_called = False
+        self.switch_to = self
+
+    def new_window(self, kind: str):
+        self.windows.append(f"tab{len(self.windows)}")
+        self.current_window_handle = self.windows[-1]
+
+    def window(self, handle: str):
+        self.current_window_handle = handle
+
+    def close(self):
+        self.windows.remove(self.current_window_handle)
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_attach_to_shared_browser(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("checkhost_scraper.scraper.webdriver.Chrome", FakeSharedChrome)
+    scraper = CheckHostReportScraper(debugger_address="127.0.0.1:9222")
+    driver = scraper.driver
+    assert driver.options.debugger_address == "127.0.0.1:9222"
+    assert "--headless" not in driver.options.arguments
+    assert driver.current_window_handle == "tab1"
+
+    scraper.close()
+    assert driver.windows == ["existing"]
+    assert driver.quit_called
@@ -0,0 +1,193 @@
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from checkhost_scraper.pool import ScraperPool
+from checkhost_scraper.server import make_server
+from checkhost_scraper.models import CheckHostReport, PoolBusyException
+
+
+class FakeScraper:
+    def start(self):
+        pass
+
+    def scrape(self, report_id: str, **scrape_kwargs) -> CheckHostReport:
+        return CheckHostReport(
+            report_id=report_id,
+            permalink=f"https://check-host.net/check-report/{report_id}",
+            report_type="check-http",
+            target="https://1.1.1.1",
+            date="2025-03-08T20:28:15",
+            results=[],
+        )
+
+    def close(self):
+        pass
+
+
+class StragglingScraper(FakeScraper):
+    """
+    The first attempt at report "slow" straggles; any later attempt is fast.
+    """
+    attempts = 0
+
+    def scrape(self, report_id: str, **scrape_kwargs) -> CheckHostReport:
+        if report_id == "slow":
+            StragglingScraper.attempts += 1
+            if StragglingScraper.attempts == 1:
+                time.sleep(2)
+        return super().scrape(report_id, **scrape_kwargs)
+
+
+class CrashingScraper(FakeScraper):
+    """
+    Report "crash" raises, as a crashed browser tab would.
+    """
+    def scrape(self, report_id: str, **scrape_kwargs) -> CheckHostReport:
+        if report_id == "crash":
+            raise RuntimeError("tab crashed")
+        return super().scrape(report_id, **scrape_kwargs)
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    pool = ScraperPool(size=2, max_queue=4, scraper_factory=FakeScraper)
+    server = make_server(pool, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    pool.close()
+
+
+def test_pool_rejects_when_full():
+    pool = ScraperPool(size=1, max_queue=1, scraper_factory=FakeScraper)
+    with pytest.raises(PoolBusyException):
+        pool.scrape_many(["a", "b", "c"])
+    assert [r.report_id for r in pool.scrape_many(["a", "b"])] == ["a", "b"]
+    pool.close()
+
+
+def test_pool_hedges_stragglers():
+    StragglingScraper.attempts = 0
+    pool = ScraperPool(size=2, scraper_factory=StragglingScraper, hedge_percentile=95, hedge_min_samples=5)
+    pool.scrape_many([f"warmup{i}" for i in range(5)])
+
+    start = time.monotonic()
+    assert pool.scrape("slow").report_id == "slow"
+    assert time.monotonic() - start < 1
+    assert pool.hedge_counts == {"sent": 1, "won": 1}
+    pool.close()
+
+
+def test_pool_hedges_stragglers_in_cold_batch():
+    StragglingScraper.attempts = 0
+    pool = ScraperPool(size=4, scraper_factory=StragglingScraper, hedge_percentile=95)
+    report_ids = [f"fast{i}" for i in range(60)]
+    report_ids.insert(5, "slow")
+
+    start = time.monotonic()
+    reports = pool.scrape_many(report_ids)
+    assert time.monotonic() - start < 1
+    assert [r.report_id for r in reports] == report_ids
+    assert pool.hedge_counts["won"] >= 1
+    pool.close()
+
+
+def test_pool_iter_scrape_streams_in_order():
+    pool = ScraperPool(size=2, max_queue=2, scraper_factory=FakeScraper)
+    report_ids = [f"report{i}" for i in range(20)]
+    assert [r.report_id for r in pool.iter_scrape(report_ids)] == report_ids
+    assert pool.stats()["queued"] == 0
+    pool.close()
+
+
+def test_pool_iter_scrape_hedges_mid_stream():
+    # A hedged report's losing attempt keeps its slot, so later reports must wait for room
+    StragglingScraper.attempts = 0
+    pool = ScraperPool(size=2, max_queue=2, scraper_factory=StragglingScraper, hedge_percentile=95)
+    report_ids = [f"fast{i}" for i in range(40)]
+    report_ids.insert(30, "slow")
+
+    start = time.monotonic()
+    assert [r.report_id for r in pool.iter_scrape(report_ids)] == report_ids
+    assert time.monotonic() - start < 1
+    assert pool.hedge_counts["won"] >= 1
+    pool.close()
+
+
+def test_health(base_url: str):
+    with urllib.request.urlopen(f"{base_url}/health") as resp:
+        body = json.loads(resp.read())
+    assert body["status"] == "ok"
+    assert body["size"] == 2
+
+
+def test_get_report(base_url: str):
+    with urllib.request.urlopen(f"{base_url}/report/23d52df5k770") as resp:
+        body = resp.read().decode()
+    assert body == FakeScraper().scrape("23d52df5k770").model_dump_json()
+
+
+def test_post_reports(base_url: str):
+    req = urllib.request.Request(
+        f"{base_url}/reports",
+        data=json.dumps({"report_ids": ["23d52df5k770", "23d58148k840"]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req) as resp:
+        body = json.loads(resp.read())
+    assert [r["report_id"] for r in body] == ["23d52df5k770", "23d58148k840"]
+
+
+def test_invalid_report_id(base_url: str):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(f"{base_url}/report/not..valid")
+    assert e.value.code == 400
+
+
+def test_oversized_batch(base_url: str):
+    # The fixture's pool holds at most 2 + 4 reports
+    req = urllib.request.Request(
+        f"{base_url}/reports",
+        data=json.dumps({"report_ids": [f"report{i}" for i in range(7)]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(req)
+    assert e.value.code == 413
+
+
+def test_negative_content_length(base_url: str):
+    conn = http.client.HTTPConnection(base_url[len("http://"):], timeout=5)
+    conn.putrequest("POST", "/reports")
+    conn.putheader("Content-Length", "-1")
+    conn.endheaders()
+    assert conn.getresponse().status == 400
+    conn.close()
+
+
+def test_post_reports_records_failed_report():
+    pool = ScraperPool(size=2, max_queue=4, scraper_factory=CrashingScraper)
+    server = make_server(pool, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_address[1]}/reports",
+        data=json.dumps({"report_ids": ["23d52df5k770", "crash", "23d58148k840"]}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req) as resp:
+        body = json.loads(resp.read())
+    server.shutdown()
+    server.server_close()
+    pool.close()
+
+    assert [r["report_id"] for r in body] == ["23d52df5k770", "crash", "23d58148k840"]
+    assert body[1]["error"] == "RuntimeError"
+    assert body[1]["reason"] == "tab crashed"